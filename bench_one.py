@@ -0,0 +1,46 @@
+#!/usr/bin/env python
+"""
+Range query benchmark for a single cyaccess build
+Runs in its own process and reports the results as JSON on stdout
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from real_enhanced_benchmark import (MISSING_BUILD, benchmark_range_queries_real, get_network,
+                                     sample_test_nodes)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--impl', default='enhanced',
+                        help="cyaccess build to load: 'enhanced' or a pandana/cyaccess_<impl> file")
+    parser.add_argument('--size', default='medium', choices=['small', 'medium', 'large'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--num-nodes', type=int, default=10, help="query sources to sample")
+    parser.add_argument('--distances', type=float, nargs='+', default=[500, 1000])
+    args = parser.parse_args()
+
+    # Keep stdout for the JSON alone: everything else, including the C++
+    # extension's progress output, goes to stderr
+    json_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+    sys.stdout.flush()
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
+    try:
+        nodes_df, edges_df, net = get_network(args.size, seed=args.seed, impl=args.impl)
+    except ModuleNotFoundError as e:
+        print(f"⚠️  {e}", file=sys.stderr)
+        return MISSING_BUILD
+
+    distances = [int(d) if d.is_integer() else d for d in args.distances]
+    test_nodes = sample_test_nodes(nodes_df, args.num_nodes, seed=args.seed)
+    results = benchmark_range_queries_real(net, test_nodes, distances, args.impl.title())
+
+    json.dump(results, json_out)
+    json_out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
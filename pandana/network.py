@@ -1,10 +1,15 @@
 from __future__ import division, print_function
 
+import glob
+import importlib.machinery
+import importlib.util
+import os
+import sys
+
 import numpy as np
 import pandas as pd
 from sklearn.neighbors import KDTree
 
-from .cyaccess import cyaccess
 from .loaders import pandash5 as ph5
 import warnings
 
@@ -29,6 +34,61 @@ def reserve_num_graphs(num):
     return None
 
 
+# cyaccess builds by name, loaded on first use; "enhanced" is the extension
+# compiled from src/
+_cyaccess_impls = {}
+
+
+def _get_cyaccess(impl):
+    """
+    Return the cyaccess class of the named build.
+
+    Builds other than "enhanced" are extension files named
+    ``cyaccess_<impl>`` next to this module, e.g. an original Pandana build
+    saved as ``cyaccess_original.pyd``. Each build is loaded the first time
+    it is asked for, so a process that only uses one build never loads the
+    others; builds loaded together sit side by side without replacing each
+    other.
+
+    """
+    if impl == "enhanced" and impl not in _cyaccess_impls:
+        from .cyaccess import cyaccess
+
+        _cyaccess_impls[impl] = cyaccess
+
+    if impl not in _cyaccess_impls:
+        pattern = os.path.join(os.path.dirname(__file__), "cyaccess_{}.*".format(impl))
+        paths = [
+            path
+            for path in glob.glob(pattern)
+            if path.endswith(tuple(importlib.machinery.EXTENSION_SUFFIXES))
+        ]
+        if not paths:
+            raise ModuleNotFoundError(
+                "No cyaccess build named '{}': expected an extension file "
+                "matching {}".format(impl, pattern)
+            )
+
+        # The renamed file still exports PyInit_cyaccess, so load it under that
+        # name, as a separate module object
+        loader = importlib.machinery.ExtensionFileLoader("pandana.cyaccess", paths[0])
+        spec = importlib.util.spec_from_file_location(
+            "pandana.cyaccess", paths[0], loader=loader
+        )
+        previous = sys.modules.get("pandana.cyaccess")
+        module = importlib.util.module_from_spec(spec)
+        loader.exec_module(module)
+        # Loading registers the build in sys.modules under that name; put back
+        # what was there, so "enhanced" still imports the extension from src/
+        if previous is None:
+            sys.modules.pop("pandana.cyaccess", None)
+        else:
+            sys.modules["pandana.cyaccess"] = previous
+        _cyaccess_impls[impl] = module.cyaccess
+
+    return _cyaccess_impls[impl]
+
+
 class Network:
     """
     Create the transportation network in the city.  Typical data would be
@@ -62,10 +122,24 @@ class Network:
         network. If twoway = False, it is assumed that travel can only occur
         in the explicit direction indicated by the from and to ID in the edge
         table.
+    impl : str, optional
+        Which cyaccess build backs the network. "enhanced" (the default) is
+        the extension built from this source tree; any other name loads the
+        extension file ``pandana/cyaccess_<impl>`` alongside it, so that e.g.
+        an original Pandana build can be benchmarked in the same process.
 
     """
 
-    def __init__(self, node_x, node_y, edge_from, edge_to, edge_weights, twoway=True):
+    def __init__(
+        self,
+        node_x,
+        node_y,
+        edge_from,
+        edge_to,
+        edge_weights,
+        twoway=True,
+        impl="enhanced",
+    ):
         nodes_df = pd.DataFrame({"x": node_x, "y": node_y})
         edges_df = pd.DataFrame({"from": edge_from, "to": edge_to}).join(edge_weights)
 
@@ -91,7 +165,7 @@ class Network:
             axis=1,
         )
 
-        self.net = cyaccess(
+        self.net = _get_cyaccess(impl)(
             self.node_idx.values,
             nodes_df.astype("double").values,
             edges.values,
@@ -6,15 +6,26 @@ Actual performance measurements on synthetic data
 
 import pandas as pd
 import numpy as np
+import argparse
+import json
+import os
+import subprocess
+import sys
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pandana.network import Network
-import shutil
-import os
+
+# Exit status of bench_one.py when the requested cyaccess build is missing
+MISSING_BUILD = 2
+
+# Synthetic networks and their POIs, built once per run and shared by every benchmark
+_NET_CACHE = {}
+_POI_CACHE = {}
 
 def create_synthetic_network(size='medium', seed=42):
     """Create realistic synthetic networks for benchmarking"""
     
-    np.random.seed(seed)
+    rng = np.random.default_rng(seed)
     
     if size == 'small':
         dim = 20  # 400 nodes
@@ -35,49 +46,175 @@ def create_synthetic_network(size='medium', seed=42):
     
     # Add some random noise to make it more realistic
     noise_factor = spacing * 0.1
-    x_coords = x_base + np.random.normal(0, noise_factor, len(x_base))
-    y_coords = y_base + np.random.normal(0, noise_factor, len(y_base))
-    
-    # Create realistic edge weights (distance + congestion factor)
-    edges = []
-    for i in range(dim):
-        for j in range(dim):
-            node_id = i * dim + j
-            
-            # Right edge (east-west street)
-            if j < dim - 1:
-                base_weight = spacing
-                # Add traffic variability and some network irregularity
-                congestion = np.random.uniform(0.8, 1.8)  
-                weight = base_weight * congestion
-                edges.append([node_id, node_id + 1, weight])
-                edges.append([node_id + 1, node_id, weight])  # Bidirectional
-            
-            # Down edge (north-south street)  
-            if i < dim - 1:
-                base_weight = spacing
-                congestion = np.random.uniform(0.8, 1.8)
-                weight = base_weight * congestion
-                edges.append([node_id, node_id + dim, weight])
-                edges.append([node_id + dim, node_id, weight])  # Bidirectional
-            
-            # Add some diagonal connections for realism (10% chance)
-            if i < dim - 1 and j < dim - 1 and np.random.random() < 0.1:
-                diagonal_weight = spacing * 1.414 * np.random.uniform(1.0, 2.0)
-                edges.append([node_id, node_id + dim + 1, diagonal_weight])
-                edges.append([node_id + dim + 1, node_id, diagonal_weight])
+    noise = rng.normal(0, noise_factor, size=(2, len(x_base)))
+    x_coords = np.ascontiguousarray(x_base + noise[0], dtype=np.float64)
+    y_coords = np.ascontiguousarray(y_base + noise[1], dtype=np.float64)
+    
+    # Grid position of every node, node_id = i * dim + j
+    ii, jj = np.meshgrid(np.arange(dim), np.arange(dim), indexing='ij')
+    ii, jj = ii.ravel(), jj.ravel()
+    node_ids = (ii * dim + jj).astype(np.int64)
+    
+    # Right edges (east-west streets) with traffic variability
+    east = node_ids[jj < dim - 1]
+    east_weights = spacing * rng.uniform(0.8, 1.8, len(east))
+    
+    # Down edges (north-south streets)
+    south = node_ids[ii < dim - 1]
+    south_weights = spacing * rng.uniform(0.8, 1.8, len(south))
+    
+    # Some diagonal connections for realism (10% chance)
+    interior = node_ids[(ii < dim - 1) & (jj < dim - 1)]
+    diagonal = interior[rng.random(len(interior)) < 0.1]
+    diagonal_weights = spacing * 1.414 * rng.uniform(1.0, 2.0, len(diagonal))
+    
+    # Every street is bidirectional: fill preallocated edge columns with one
+    # forward and one reverse block per street class
+    n_edges = 2 * (len(east) + len(south) + len(diagonal))
+    edge_from = np.empty(n_edges, dtype=np.int64)
+    edge_to = np.empty(n_edges, dtype=np.int64)
+    edge_weights = np.empty(n_edges, dtype=np.float64)
+    
+    start = 0
+    for tails, step, weights in ((east, 1, east_weights), (south, dim, south_weights),
+                                 (diagonal, dim + 1, diagonal_weights)):
+        middle = start + len(tails)
+        forward, reverse = slice(start, middle), slice(middle, middle + len(tails))
+        edge_from[forward] = tails
+        np.add(tails, step, out=edge_to[forward])
+        edge_from[reverse] = edge_to[forward]
+        edge_to[reverse] = tails
+        edge_weights[forward] = weights
+        edge_weights[reverse] = weights
+        start = middle + len(tails)
     
     nodes_df = pd.DataFrame({
         'x': x_coords,
         'y': y_coords
     })
     
-    edges_df = pd.DataFrame(edges, columns=['from', 'to', 'weight'])
+    edges_df = pd.DataFrame({'from': edge_from, 'to': edge_to, 'weight': edge_weights})
     
     print(f"📊 Created {description}: {len(nodes_df)} nodes, {len(edges_df)} edges")
     
     return nodes_df, edges_df
 
+def build_network(nodes_df, edges_df, impl='enhanced'):
+    """Create a pandana Network straight from the frames' column arrays"""
+    # Plain ndarrays skip index alignment when Network assembles its own frames
+    return Network(
+        node_x=nodes_df['x'].to_numpy(), 
+        node_y=nodes_df['y'].to_numpy(),
+        edge_from=edges_df['from'].to_numpy(), 
+        edge_to=edges_df['to'].to_numpy(), 
+        edge_weights=edges_df[['weight']],
+        impl=impl
+    )
+
+def get_network(size='medium', seed=42, impl='enhanced'):
+    """Return (nodes_df, edges_df, net) for a synthetic network, building it on first use"""
+    key = (size, seed, impl)
+    if key not in _NET_CACHE:
+        nodes_df, edges_df = create_synthetic_network(size, seed=seed)
+        _NET_CACHE[key] = (nodes_df, edges_df, build_network(nodes_df, edges_df, impl=impl))
+    return _NET_CACHE[key]
+
+def _spread_bits(v):
+    """Put the 16 bits of each value on the even bit positions of a uint32"""
+    v = v.astype(np.uint32)
+    v = (v | (v << 8)) & 0x00FF00FF
+    v = (v | (v << 4)) & 0x0F0F0F0F
+    v = (v | (v << 2)) & 0x33333333
+    v = (v | (v << 1)) & 0x55555555
+    return v
+
+def morton_order(net, node_ids):
+    """Permutation sorting node_ids along a Morton (Z-order) curve over the node coordinates"""
+    x = net.nodes_df['x'].to_numpy()
+    y = net.nodes_df['y'].to_numpy()
+    # Quantize to 16 bits per axis over the network's bounding box
+    xi = ((x - x.min()) / max(np.ptp(x), 1e-9) * 65535).astype(np.uint16)
+    yi = ((y - y.min()) / max(np.ptp(y), 1e-9) * 65535).astype(np.uint16)
+    # Synthetic node ids are their row positions
+    codes = _spread_bits(xi[node_ids]) | (_spread_bits(yi[node_ids]) << 1)
+    return np.argsort(codes, kind='stable')
+
+def set_poi_values(net, node_ids, values, name):
+    """
+    Set a POI variable on the network, densely when the POIs are common.
+
+    Above one POI per 8 nodes a full per-node array (zero elsewhere) is set
+    instead, a sequential fill rather than scattered writes. Zeros only leave
+    'sum' aggregations unchanged, which is all this benchmark runs.
+    """
+    n_nodes = len(net.nodes_df)
+    if len(node_ids) > n_nodes / 8:
+        dense = np.zeros(n_nodes, dtype=np.float64)
+        dense[node_ids] = values  # synthetic node ids are row positions
+        net.set(node_ids=np.arange(n_nodes, dtype=np.int64), variable=dense, name=name)
+    else:
+        net.set(node_ids=node_ids, variable=values, name=name)
+
+def get_pois(net, seed=42):
+    """Generate the restaurant and job POIs for a network and set them on it once"""
+    if id(net) in _POI_CACHE:
+        return _POI_CACHE[id(net)]
+    
+    n_nodes = len(net.nodes_df)
+    rng = np.random.default_rng(seed)
+    
+    # Create realistic POI distributions
+    # Restaurants: clustered in commercial areas (2% of nodes)
+    # shuffle=False: the draws are sorted later, so skip the O(n_nodes) permutation
+    commercial_centers = rng.choice(n_nodes, size=max(1, n_nodes//200), replace=False, shuffle=False)
+    # Average 5 restaurants per center, within 50 node ids of it
+    cluster_sizes = rng.poisson(5, size=len(commercial_centers)).clip(max=20)
+    offsets = rng.integers(-50, 50, size=cluster_sizes.sum())
+    restaurant_nodes = np.clip(np.repeat(commercial_centers, cluster_sizes) + offsets, 0, n_nodes - 1)
+    restaurant_nodes = np.unique(restaurant_nodes)  # Remove duplicates
+    restaurant_values = rng.uniform(1, 5, len(restaurant_nodes))  # Quality scores
+    
+    # Jobs: more dispersed (5% of nodes)
+    job_nodes = rng.choice(n_nodes, size=int(n_nodes * 0.05), replace=False, shuffle=False)
+    job_values = rng.uniform(10, 100, len(job_nodes))  # Number of jobs
+    
+    # Hand POIs over in space-filling-curve order so nearby POIs sit together in memory
+    order = morton_order(net, restaurant_nodes)
+    restaurant_nodes, restaurant_values = restaurant_nodes[order], restaurant_values[order]
+    order = morton_order(net, job_nodes)
+    job_nodes, job_values = job_nodes[order], job_values[order]
+    
+    # Set POI data
+    set_poi_values(net, restaurant_nodes, restaurant_values, 'restaurants')
+    set_poi_values(net, job_nodes, job_values, 'jobs')
+    
+    _POI_CACHE[id(net)] = {
+        'restaurants': (restaurant_nodes, restaurant_values),
+        'jobs': (job_nodes, job_values)
+    }
+    return _POI_CACHE[id(net)]
+
+def sample_test_nodes(nodes_df, size, cell=250, seed=42):
+    """Sample query sources and order them by grid cell, so consecutive sources are neighbors"""
+    rng = np.random.default_rng(seed)
+    test_nodes = rng.choice(len(nodes_df), size=size, replace=False, shuffle=False)
+    xy = nodes_df[['x', 'y']].to_numpy()[test_nodes]
+    order = np.lexsort((xy[:, 1] // cell, xy[:, 0] // cell))
+    return test_nodes[order]
+
+def time_per_call(func, min_time=0.1):
+    """Seconds per call of func, repeated back to back until one batch runs for min_time"""
+    number = 1
+    while True:
+        start_ns = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        elapsed_ns = time.perf_counter_ns() - start_ns
+        if elapsed_ns >= min_time * 1e9:
+            return elapsed_ns / number / 1e9
+        # Scale the batch from this estimate, at least doubling it
+        number = max(2 * number, int(number * min_time * 1e9 / max(elapsed_ns, 1) * 1.2))
+
 def benchmark_range_queries_real(net, test_nodes, distances, label):
     """Real benchmark of range queries with actual timing"""
     
@@ -87,7 +224,9 @@ def benchmark_range_queries_real(net, test_nodes, distances, label):
     results = {}
     
     for distance in distances:
-        print(f"\n📊 Testing {distance}m range queries...")
+        # Report lines are printed once the distance is done, never between measurements
+        log_lines = []
+        log_lines.append(f"\n📊 Testing {distance}m range queries...")
         
         # Single node queries - measure actual performance
         single_times = []
@@ -96,14 +235,13 @@ def benchmark_range_queries_real(net, test_nodes, distances, label):
         # Warm up (first query can be slower due to caching)
         _ = net.nodes_in_range([test_nodes[0]], distance, imp_name='weight')
         
-        # Measure actual performance
+        # Measure actual performance: each query is repeated for 0.1s in one
+        # timed batch, so timer overhead is spread over many calls
         for node in test_nodes[:5]:
-            start_time = time.perf_counter()
-            result = net.nodes_in_range([node], distance, imp_name='weight')
-            end_time = time.perf_counter()
+            single_times.append(time_per_call(
+                lambda: net.nodes_in_range([node], distance, imp_name='weight')))
             
-            query_time = end_time - start_time
-            single_times.append(query_time)
+            result = net.nodes_in_range([node], distance, imp_name='weight')
             single_node_counts.append(len(result))
         
         avg_single_time = np.mean(single_times)
@@ -120,20 +258,14 @@ def benchmark_range_queries_real(net, test_nodes, distances, label):
                 _ = net.nodes_in_range(test_nodes[:batch_size], distance, imp_name='weight')
                 
                 # Actual measurement
-                start_time = time.perf_counter()
-                batch_result = net.nodes_in_range(test_nodes[:batch_size], distance, imp_name='weight')
-                end_time = time.perf_counter()
+                batch_nodes = test_nodes[:batch_size]
+                batch_time = time_per_call(
+                    lambda: net.nodes_in_range(batch_nodes, distance, imp_name='weight'))
                 
-                batch_time = end_time - start_time
+                batch_result = net.nodes_in_range(batch_nodes, distance, imp_name='weight')
                 
-                # Count total nodes and per-source breakdown
-                if hasattr(batch_result, 'groupby'):
-                    source_counts = batch_result.groupby('source').size()
-                    total_batch_nodes = len(batch_result)
-                    avg_nodes_per_source = total_batch_nodes / batch_size
-                else:
-                    total_batch_nodes = len(batch_result)
-                    avg_nodes_per_source = total_batch_nodes / batch_size
+                # One row per (source, reached node) pair
+                total_batch_nodes = len(batch_result)
                 
                 # Calculate actual efficiency vs individual queries
                 estimated_individual_time = avg_single_time * batch_size
@@ -145,8 +277,8 @@ def benchmark_range_queries_real(net, test_nodes, distances, label):
                     'efficiency': actual_efficiency
                 }
                 
-                print(f"  • Batch {batch_size}: {batch_time:.5f}s total, {total_batch_nodes} nodes")
-                print(f"    ⚡ Efficiency: {actual_efficiency:.1f}x vs individual queries")
+                log_lines.append(f"  • Batch {batch_size}: {batch_time:.5f}s total, {total_batch_nodes} nodes")
+                log_lines.append(f"    ⚡ Efficiency: {actual_efficiency:.1f}x vs individual queries")
         
         results[distance] = {
             'single_time_mean': avg_single_time,
@@ -155,7 +287,8 @@ def benchmark_range_queries_real(net, test_nodes, distances, label):
             'batch_results': batch_results
         }
         
-        print(f"  ✅ Single query: {avg_single_time:.5f}s ± {std_single_time:.5f}s, {avg_single_nodes:.1f} nodes avg")
+        log_lines.append(f"  ✅ Single query: {avg_single_time:.5f}s ± {std_single_time:.5f}s, {avg_single_nodes:.1f} nodes avg")
+        print("\n".join(log_lines))
     
     return results
 
@@ -165,38 +298,23 @@ def benchmark_accessibility_real(net, distances, label):
     print(f"\n🔄 REAL Accessibility Benchmark - {label}")
     print("-" * 45)
     
-    n_nodes = len(net.nodes_df)
-    
-    # Create realistic POI distributions
-    # Restaurants: clustered in commercial areas (2% of nodes)
-    commercial_centers = np.random.choice(n_nodes, size=max(1, n_nodes//200), replace=False)
-    restaurant_nodes = []
-    for center in commercial_centers:
-        cluster_size = np.random.poisson(5)  # Average 5 restaurants per center
-        cluster_nodes = np.random.choice(
-            range(max(0, center-50), min(n_nodes, center+50)), 
-            size=min(cluster_size, 20), 
-            replace=False
-        )
-        restaurant_nodes.extend(cluster_nodes)
-    
-    restaurant_nodes = list(set(restaurant_nodes))  # Remove duplicates
-    restaurant_values = np.random.uniform(1, 5, len(restaurant_nodes))  # Quality scores
-    
-    # Jobs: more dispersed (5% of nodes)
-    job_nodes = np.random.choice(n_nodes, size=int(n_nodes * 0.05), replace=False)
-    job_values = np.random.uniform(10, 100, len(job_nodes))  # Number of jobs
+    pois = get_pois(net)
+    restaurant_nodes, _ = pois['restaurants']
+    job_nodes, _ = pois['jobs']
     
     print(f"  📍 POI setup: {len(restaurant_nodes)} restaurants, {len(job_nodes)} job locations")
     
-    # Set POI data
-    net.set(node_ids=restaurant_nodes, variable=restaurant_values, name='restaurants')
-    net.set(node_ids=job_nodes, variable=job_values, name='jobs')
-    
     results = {}
     
     for distance in distances:
-        print(f"\n📊 Testing {distance}m accessibility...")
+        log_lines = []
+        log_lines.append(f"\n📊 Testing {distance}m accessibility...")
+        
+        # Reachability is the same for both POI categories: compute it once per
+        # distance and let both aggregations read the cached ranges
+        start_time = time.perf_counter()
+        net.precompute(distance)
+        reach_time = time.perf_counter() - start_time
         
         # Restaurant accessibility - actual timing
         start_time = time.perf_counter()
@@ -209,6 +327,7 @@ def benchmark_accessibility_real(net, distances, label):
         job_time = time.perf_counter() - start_time
         
         results[distance] = {
+            'reach_time': reach_time,
             'restaurant_time': restaurant_time,
             'job_time': job_time,
             'restaurant_access_mean': restaurant_access.mean(),
@@ -219,86 +338,57 @@ def benchmark_accessibility_real(net, distances, label):
             'job_max': job_access.max()
         }
         
-        print(f"  🍽️  Restaurant access: {restaurant_time:.5f}s")
-        print(f"     Mean: {restaurant_access.mean():.2f}, Max: {restaurant_access.max():.2f}")
-        print(f"  💼 Job access: {job_time:.5f}s") 
-        print(f"     Mean: {job_access.mean():.0f}, Max: {job_access.max():.0f}")
+        log_lines.append(f"  🔍 Shared reachability: {reach_time:.5f}s")
+        log_lines.append(f"  🍽️  Restaurant access: {restaurant_time:.5f}s")
+        log_lines.append(f"     Mean: {restaurant_access.mean():.2f}, Max: {restaurant_access.max():.2f}")
+        log_lines.append(f"  💼 Job access: {job_time:.5f}s")
+        log_lines.append(f"     Mean: {job_access.mean():.0f}, Max: {job_access.max():.0f}")
+        print("\n".join(log_lines))
     
     return results
 
+def _int_keys(d):
+    """JSON object hook restoring the integer distance and batch size keys"""
+    return {int(k) if k.isdigit() else k: v for k, v in d.items()}
+
+def run_bench_one(impl, distances):
+    """Run bench_one.py for one cyaccess build in a fresh process; None if the build is missing"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench_one.py')
+    cmd = [sys.executable, script, '--impl', impl, '--size', 'medium', '--seed', '42',
+           '--num-nodes', '10', '--distances', *map(str, distances)]
+    # stdout carries the JSON results; progress output passes through on stderr
+    sys.stdout.flush()
+    proc = subprocess.run(cmd, stdout=subprocess.PIPE, text=True)
+    if proc.returncode == MISSING_BUILD:
+        return None
+    proc.check_returncode()
+    return json.loads(proc.stdout, object_hook=_int_keys)
+
 def compare_with_original():
     """Compare with original pandana if available"""
     
-    # Check if we have original backup
-    original_backup = "pandana/cyaccess_original.pyd"
-    enhanced_current = "pandana/cyaccess.pyd"
-    
-    if not os.path.exists(original_backup):
-        print("⚠️  Original pandana backup not found, skipping comparison")
-        return None
-    
     print(f"\n🔄 Comparing Enhanced vs Original Pandana")
     print("=" * 50)
     
-    # Test network
-    nodes_df, edges_df = create_synthetic_network('medium', seed=42)
-    
-    # Enhanced version results (current)
-    print(f"\n📊 Testing ENHANCED pandana...")
+    # Each build runs in its own process, so the two extensions never share one
+    compare_distances = [500, 1000]
     try:
-        net_enhanced = Network(
-            node_x=nodes_df['x'], 
-            node_y=nodes_df['y'],
-            edge_from=edges_df['from'], 
-            edge_to=edges_df['to'], 
-            edge_weights=edges_df[['weight']]
-        )
-        
-        # Quick test
-        test_nodes = np.random.choice(len(nodes_df), size=10, replace=False)
-        enhanced_results = benchmark_range_queries_real(net_enhanced, test_nodes, [500, 1000], "Enhanced")
+        print(f"\n📊 Testing ORIGINAL pandana...")
+        original_results = run_bench_one('original', compare_distances)
+        if original_results is None:
+            print("⚠️  Original pandana build not found, skipping comparison")
+            return None
         
-    except Exception as e:
-        print(f"❌ Enhanced version test failed: {e}")
+        print(f"\n📊 Testing ENHANCED pandana...")
+        enhanced_results = run_bench_one('enhanced', compare_distances)
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Benchmark process failed: {e}")
         return None
     
-    # Switch to original version
-    print(f"\n🔄 Switching to ORIGINAL pandana...")
-    try:
-        # Backup enhanced and restore original
-        shutil.copy2(enhanced_current, "pandana/cyaccess_enhanced_backup.pyd")
-        shutil.copy2(original_backup, enhanced_current)
-        
-        # Force reimport
-        import importlib
-        import pandana.network
-        importlib.reload(pandana.network)
-        
-        # Test original
-        net_original = Network(
-            node_x=nodes_df['x'], 
-            node_y=nodes_df['y'],
-            edge_from=edges_df['from'], 
-            edge_to=edges_df['to'], 
-            edge_weights=edges_df[['weight']]
-        )
-        
-        original_results = benchmark_range_queries_real(net_original, test_nodes, [500, 1000], "Original")
-        
-        # Restore enhanced version
-        shutil.copy2("pandana/cyaccess_enhanced_backup.pyd", enhanced_current)
-        
-        return {
-            'enhanced': enhanced_results,
-            'original': original_results
-        }
-        
-    except Exception as e:
-        print(f"❌ Original version test failed: {e}")
-        # Make sure to restore enhanced version
-        if os.path.exists("pandana/cyaccess_enhanced_backup.pyd"):
-            shutil.copy2("pandana/cyaccess_enhanced_backup.pyd", enhanced_current)
-        return None
+    return {
+        'enhanced': enhanced_results,
+        'original': original_results
+    }
 
 def analyze_performance_improvements(results):
     """Analyze actual performance improvements"""
@@ -338,53 +428,63 @@ def analyze_performance_improvements(results):
                 print(f"     Enhanced: {enh_batch['time']:.5f}s")
                 print(f"     🚀 Improvement: {batch_improvement:.2f}x faster")
 
-def main():
-    """Main benchmark execution with REAL measurements"""
+# Test distances (meters)
+DISTANCES = [300, 500, 1000, 1500]
+
+def run_size(size):
+    """Build one network size and run the range and accessibility benchmarks on it"""
+    print(f"\n{'='*20} {size.upper()} NETWORK BENCHMARK {'='*20}")
+    
+    # Create synthetic and pandana network - measure creation time
+    print(f"🔄 Creating pandana network...")
+    start_time = time.perf_counter()
+    nodes_df, edges_df, net = get_network(size)
+    creation_time = time.perf_counter() - start_time
+    print(f"✅ Network created in {creation_time:.3f}s")
+    
+    # Sample test nodes
+    n_nodes = len(nodes_df)
+    test_nodes = sample_test_nodes(nodes_df, min(25, n_nodes//20))
+    
+    # Real benchmark tests
+    range_results = benchmark_range_queries_real(net, test_nodes, DISTANCES, size)
+    access_results = benchmark_accessibility_real(net, DISTANCES, size)
+    
+    return size, {
+        'creation_time': creation_time,
+        'range': range_results,
+        'accessibility': access_results,
+        'network_size': len(nodes_df),
+        'network_edges': len(edges_df)
+    }
+
+def main(parallel=False):
+    """Main benchmark execution with REAL measurements
+
+    parallel - time the network sizes side by side in worker processes. Each
+        size's OpenMP work already uses every core, so the timings contend;
+        use it for a quick run, not for numbers to compare.
+    """
     
     print("🚀 REAL Enhanced Pandana Benchmark")
     print("=" * 50)
     print("Measuring actual performance on synthetic networks\n")
     
-    # Test distances (meters)
-    distances = [300, 500, 1000, 1500]
-    
-    # Test different network sizes with actual timing
-    all_results = {}
-    
-    for size in ['small', 'medium', 'large']:
-        print(f"\n{'='*20} {size.upper()} NETWORK BENCHMARK {'='*20}")
-        
-        # Create synthetic network
-        nodes_df, edges_df = create_synthetic_network(size)
-        
-        # Create pandana network - measure creation time
-        print(f"🔄 Creating pandana network...")
-        start_time = time.perf_counter()
-        net = Network(
-            node_x=nodes_df['x'], 
-            node_y=nodes_df['y'],
-            edge_from=edges_df['from'], 
-            edge_to=edges_df['to'], 
-            edge_weights=edges_df[['weight']]
-        )
-        creation_time = time.perf_counter() - start_time
-        print(f"✅ Network created in {creation_time:.3f}s")
-        
-        # Sample test nodes
-        n_nodes = len(nodes_df)
-        test_nodes = np.random.choice(n_nodes, size=min(25, n_nodes//20), replace=False)
-        
-        # Real benchmark tests
-        range_results = benchmark_range_queries_real(net, test_nodes, distances, size)
-        access_results = benchmark_accessibility_real(net, distances, size)
-        
-        all_results[size] = {
-            'creation_time': creation_time,
-            'range': range_results,
-            'accessibility': access_results,
-            'network_size': len(nodes_df),
-            'network_edges': len(edges_df)
-        }
+    distances = DISTANCES
+    sizes = ['small', 'medium', 'large']
+    
+    # Test different network sizes with actual timing, one after another by
+    # default: pandana's OpenMP precompute and batch queries already use every
+    # core, so sizes timed side by side contend with each other
+    if parallel:
+        print("⚠️  Timing sizes in parallel: they share the cores, so times are inflated\n")
+        # Each worker builds its own Network: the C++ graph cannot be pickled,
+        # and only the plain results dict comes back
+        sys.stdout.flush()  # so forked workers don't inherit and repeat buffered output
+        with ProcessPoolExecutor(max_workers=min(len(sizes), os.cpu_count() or 1)) as pool:
+            all_results = dict(pool.map(run_size, sizes))
+    else:
+        all_results = dict(run_size(size) for size in sizes)
     
     # Original vs Enhanced comparison
     comparison_results = compare_with_original()
@@ -429,8 +529,16 @@ def main():
     return all_results
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--parallel', action='store_true',
+                        help="time the network sizes concurrently; faster, but the timings contend")
+    args = parser.parse_args()
+    
+    # Block-buffer stdout even on a terminal, so reporting costs no syscall per line
+    sys.stdout.reconfigure(line_buffering=False)
+    
     print("REAL Enhanced Pandana Performance Validation")
     print("Using actual synthetic data and timing measurements\n")
     
-    results = main()
+    results = main(parallel=args.parallel)
     print(f"\n✅ Real benchmark completed successfully!")
\ No newline at end of file
@@ -63,7 +63,8 @@ void
 Accessibility::precomputeRangeQueries(float radius) {
     dms.resize(ga.size());
     for (int i = 0 ; i < ga.size() ; i++) {
-        dms[i].resize(numnodes);
+        // Range() appends, so drop any ranges left from an earlier radius
+        dms[i].assign(numnodes, DistanceVec());
     }
 
     #pragma omp parallel
@@ -92,19 +93,37 @@ Accessibility::Range(vector<long long> srcnodes, float radius, int graphno,
     for (int i = 0; i < ext_ids.size(); i++) {
         int_ids.insert(pair<long, int>(ext_ids[i], i));
     }
+
+    // Resolve the sources up front; ids not in the network (-1) get an
+    // empty range instead of silently searching from node 0
+    vector<int> src_ids(srcnodes.size(), -1);
+    for (int i = 0; i < srcnodes.size(); i++) {
+        auto it = int_ids.find(srcnodes[i]);
+        if (it != int_ids.end()) src_ids[i] = it->second;
+    }
     
     // use cached results if available
     vector<DistanceVec> dists(srcnodes.size());
     if (dmsradius > 0 && radius <= dmsradius) {
         for (int i = 0; i < srcnodes.size(); i++) {
-            dists[i] = dms[graphno][int_ids[srcnodes[i]]];
+            if (src_ids[i] < 0) continue;
+            const DistanceVec &cached = dms[graphno][src_ids[i]];
+            if (radius == dmsradius) {
+                dists[i] = cached;
+                continue;
+            }
+            // the cache holds everything within dmsradius, keep only this radius
+            for (int j = 0; j < cached.size(); j++) {
+                if (cached[j].second <= radius) dists[i].push_back(cached[j]);
+            }
         }
     }
     else {
         #pragma omp parallel
         #pragma omp for schedule(guided)
         for (int i = 0; i < srcnodes.size(); i++) {
-            ga[graphno]->Range(int_ids[srcnodes[i]], radius,
+            if (src_ids[i] < 0) continue;
+            ga[graphno]->Range(src_ids[i], radius,
                 omp_get_thread_num(), dists[i]);
         }
     }
@@ -91,6 +91,10 @@ cdef convert_3D_vector_to_array_int(vector[vector[vector[int]]] vec):
     return result
 
 
+# Record layout of nodes_in_range(..., as_array=True) results
+RANGE_DTYPE = np.dtype([('id', np.int64), ('dist', np.float64)])
+
+
 cdef class cyaccess:
     cdef Accessibility * access
 
@@ -300,14 +304,105 @@ cdef class cyaccess:
         self.access.precomputeRangeQueries(radius)
 
     def nodes_in_range(self, vector[long long] srcnodes, float radius, int impno, 
-            np.ndarray[long long] ext_ids):
+            np.ndarray[long long] ext_ids, bint as_array=False):
+        """
+        srcnodes - node ids of origins
+        radius - maximum range in which to search for nearby nodes
+        impno - the impedance id to use
+        ext_ids - all node ids in the network
+        as_array - return (ranges, offsets) instead of a list of (id, distance)
+            tuples per source: ranges is one RANGE_DTYPE array holding every
+            range back to back, and the range of source i is
+            ranges[offsets[i]:offsets[i + 1]]
+
+        Each range lists its nodes in order of increasing distance, so it
+        starts with the source itself at distance 0; unknown sources get an
+        empty range
+        """
+        cdef vector[vector[pair[long long, float]]] ranges = self.access.Range(
+            srcnodes, radius, impno, ext_ids)
+        if not as_array:
+            return ranges
+        cdef Py_ssize_t i, j, n = 0
+        cdef np.ndarray[long long] offsets = np.empty(ranges.size() + 1, dtype=np.int64)
+        for i in range(ranges.size()):
+            offsets[i] = n
+            n += ranges[i].size()
+        offsets[ranges.size()] = n
+        arr = np.empty(n, dtype=RANGE_DTYPE)
+        cdef long long[:] ids = arr['id']
+        cdef double[:] dists = arr['dist']
+        n = 0
+        for i in range(ranges.size()):
+            for j in range(ranges[i].size()):
+                ids[n] = ranges[i][j].first
+                dists[n] = ranges[i][j].second
+                n += 1
+        return arr, offsets
+
+    def nodes_in_range_into(self, vector[long long] srcnodes, float radius, int impno,
+            np.ndarray[long long] ext_ids, long long[:] out_ids, double[:] out_dists,
+            long long[:] out_offsets):
         """
         srcnodes - node ids of origins
         radius - maximum range in which to search for nearby nodes
         impno - the impedance id to use
         ext_ids - all node ids in the network
+        out_ids, out_dists - caller-owned buffers that receive the ranges back
+            to back
+        out_offsets - caller-owned buffer for len(srcnodes) + 1 offsets; the
+            range of source i is out_ids[out_offsets[i]:out_offsets[i + 1]]
+
+        Returns the number of nodes written
+        """
+        cdef vector[vector[pair[long long, float]]] ranges = self.access.Range(
+            srcnodes, radius, impno, ext_ids)
+        cdef Py_ssize_t i, j, n = 0
+        if out_offsets.shape[0] < <Py_ssize_t>ranges.size() + 1:
+            raise ValueError("out_offsets needs room for len(srcnodes) + 1 offsets")
+        for i in range(ranges.size()):
+            n += ranges[i].size()
+        if out_ids.shape[0] < n or out_dists.shape[0] < n:
+            raise ValueError(
+                "output buffers are smaller than the {} nodes in range".format(n))
+        n = 0
+        for i in range(ranges.size()):
+            out_offsets[i] = n
+            for j in range(ranges[i].size()):
+                out_ids[n] = ranges[i][j].first
+                out_dists[n] = ranges[i][j].second
+                n += 1
+        out_offsets[ranges.size()] = n
+        return n
+
+    def nodes_in_ranges(self, vector[long long] srcnodes, radii, int impno,
+            np.ndarray[long long] ext_ids):
+        """
+        srcnodes - node ids of origins
+        radii - one or more non-negative search radii, in any order; a single
+            search to the largest of them serves all
+        impno - the impedance id to use
+        ext_ids - all node ids in the network
+
+        Returns one (ranges, offsets) pair per radius, in the order given,
+        laid out like nodes_in_range(..., as_array=True)
         """
-        return self.access.Range(srcnodes, radius, impno, ext_ids)
+        radii = np.asarray(radii, dtype=np.float64).ravel()
+        if radii.size == 0:
+            raise ValueError("radii must hold at least one radius")
+        if not np.all(radii >= 0):
+            raise ValueError("radii must be non-negative numbers, got {}".format(radii))
+
+        arr, offsets = self.nodes_in_range(srcnodes, radii.max(), impno, ext_ids,
+                                           as_array=True)
+        results = []
+        for radius in radii:
+            within = arr['dist'] <= radius
+            # Each range keeps its order, so its new bounds are the running
+            # count of kept nodes at its old bounds
+            kept = np.concatenate(([0], np.cumsum(within)))
+            results.append((arr[within], kept[offsets]))
+        return results
 
     def hybrid_nodes_in_range(self, vector[long long] srcnodes, float radius, int impno, 
             np.ndarray[long long] ext_ids, int k_rounds=3):
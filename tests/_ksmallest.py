@@ -0,0 +1,54 @@
+"""
+Bounded max-heap sink for the k nearest POIs, shared by the partial ordering tests
+"""
+
+import heapq
+
+
+def _nearest_first(h):
+    """Unpack a negated (-distance, -poi_id) heap into (poi_id, distance) entries, nearest first"""
+    return [(-pid, -d) for d, pid in sorted(h, reverse=True)]
+
+
+def sink(entries, k):
+    """Stream (poi_id, distance) entries through a size-k max-heap
+
+    Returns the k entries with the smallest distances, nearest first; equal
+    distances are broken by the smaller poi_id.
+    """
+    if k <= 0:
+        return []
+    # Negated keys turn heapq's min-heap into a max-heap: h[0] is the worst kept entry
+    h = []
+    for pid, d in entries:
+        item = (-d, -pid)
+        if len(h) < k:
+            heapq.heappush(h, item)
+        elif item > h[0]:
+            heapq.heapreplace(h, item)
+    return _nearest_first(h)
+
+
+def sink_with_overflow(entries, k, overflow_size=None):
+    """Like sink, but entries that miss or drop out of the k nearest spill into an overflow bucket
+
+    The overflow is itself a bounded max-heap (2 * k by default) holding the
+    nearest of the spilled entries. Returns (nearest, overflow), both nearest
+    first.
+    """
+    if overflow_size is None:
+        overflow_size = 2 * k
+    main, overflow = [], []
+    for pid, d in entries:
+        item = (-d, -pid)
+        if len(main) < k:
+            heapq.heappush(main, item)
+            continue
+        if main and item > main[0]:
+            # The displaced worst entry spills over instead of the new one
+            item = heapq.heapreplace(main, item)
+        if len(overflow) < overflow_size:
+            heapq.heappush(overflow, item)
+        elif overflow and item > overflow[0]:
+            heapq.heapreplace(overflow, item)
+    return _nearest_first(main), _nearest_first(overflow)
@@ -0,0 +1,12 @@
+"""
+Numba's njit when it is installed, otherwise a no-op decorator
+"""
+
+try:
+    from numba import njit
+except ImportError:
+    # The decorated helpers run as plain Python without Numba
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
@@ -0,0 +1,45 @@
+"""
+Shared test setup: a Parquet snapshot of the sample OSM network
+"""
+
+import os
+
+import pandas as pd
+import pytest
+
+SAMPLE_H5 = os.path.join(os.path.dirname(__file__), "osm_sample.h5")
+NODES_PARQUET = os.path.join(os.path.dirname(__file__), "osm_sample.nodes.parquet")
+EDGES_PARQUET = os.path.join(os.path.dirname(__file__), "osm_sample.edges.parquet")
+
+
+def _have_parquet():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _snapshot_current():
+    """Whether both Parquet files exist and are newer than the HDF5 sample"""
+    h5_mtime = os.path.getmtime(SAMPLE_H5)
+    return all(os.path.exists(path) and os.path.getmtime(path) >= h5_mtime
+               for path in (NODES_PARQUET, EDGES_PARQUET))
+
+
+def pytest_sessionstart(session):
+    """Convert the HDF5 sample to Parquet once, for faster columnar reads later"""
+    if not os.path.exists(SAMPLE_H5) or not _have_parquet() or _snapshot_current():
+        return
+    with pd.HDFStore(SAMPLE_H5, "r") as store:
+        store.nodes.to_parquet(NODES_PARQUET, compression="zstd")
+        store.edges.to_parquet(EDGES_PARQUET, compression="zstd")
+
+
+@pytest.fixture(scope="session")
+def osm_sample_frames():
+    """(nodes, edges) of the sample OSM network, from the Parquet snapshot when present"""
+    if _have_parquet() and _snapshot_current():
+        return pd.read_parquet(NODES_PARQUET), pd.read_parquet(EDGES_PARQUET)
+    with pd.HDFStore(SAMPLE_H5, "r") as store:
+        return store.nodes, store.edges
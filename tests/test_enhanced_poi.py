@@ -3,25 +3,54 @@ Unit tests for enhanced POI queries with partial ordering
 Tests the implementation logic and performance characteristics
 """
 
+import heapq
+import math
 import unittest
+from operator import itemgetter
 import numpy as np
-from unittest.mock import Mock, patch
+
+from _ksmallest import sink, sink_with_overflow
+
+# Shared seeded generator for the randomized fixtures
+rng = np.random.default_rng(0)
+
+
+def aos_to_soa(entries):
+    """Split (poi_id, distance) tuples into parallel id and distance arrays"""
+    a = np.asarray(entries)
+    return a[:, 0].astype(np.int64), a[:, 1].astype(np.float64)
+
+
+def k_smallest_soa(poi_ids, poi_dists, k):
+    """The k nearest POIs as (ids, distances) arrays; ties keep input order"""
+    top = np.argsort(poi_dists, kind='stable')[:k]
+    return poi_ids[top], poi_dists[top]
+
+
+def k_smallest(entries, k):
+    """The k (poi_id, distance) entries with the smallest distances, nearest first"""
+    return heapq.nsmallest(k, entries, key=itemgetter(1))
+
+
+def k_smallest_indices(dists, k):
+    """Indices of the k smallest distances, nearest first, via quickselect"""
+    idx = np.argpartition(dists, k - 1)[:k]
+    return idx[np.argsort(dists[idx])]
 
 
 class TestPartialOrderingLogic(unittest.TestCase):
     """Test the logical correctness of partial ordering for POI queries"""
     
-    def setUp(self):
-        """Set up test data"""
-        self.test_node = 42
-        self.test_k = 5  # Want 5 nearest POIs
-        self.test_max_distance = 1000.0
-        self.test_category = "restaurants"
-        
-    def test_partial_bucket_logic(self):
-        """Test the partial bucket maintains k smallest correctly"""
-        # Simulate POI entries with (poi_id, distance) 
-        poi_entries = [
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data once; tests treat it as read-only"""
+        cls.test_node = 42
+        cls.test_k = 5  # Want 5 nearest POIs
+        cls.test_max_distance = 1000.0
+        cls.test_category = "restaurants"
+        
+        # Simulate POI entries with (poi_id, distance)
+        cls.poi_entries = [
             (10, 150.0),  # Should be in k=5 smallest
             (15, 200.0),  # Should be in k=5 smallest
             (20, 300.0),  # Should be in k=5 smallest
@@ -33,36 +62,54 @@ class TestPartialOrderingLogic(unittest.TestCase):
             (50, 100.0),  # Should replace worst in k smallest
             (55, 80.0),   # Should replace worst in k smallest
         ]
+        cls.poi_ids, cls.poi_dists = aos_to_soa(cls.poi_entries)
         
-        k = 5
+    def test_partial_bucket_logic(self):
+        """Test the partial bucket maintains k smallest correctly"""
+        k = self.test_k
         
-        # Test traditional full sort
-        full_sorted = sorted(poi_entries, key=lambda x: x[1])
-        k_smallest_full = full_sorted[:k]
+        # Bounded heap keeps only the k smallest seen so far
+        k_smallest_partial = k_smallest(self.poi_entries, k)
         
         # Expected k smallest: (55, 80.0), (50, 100.0), (10, 150.0), (15, 200.0), (20, 300.0)
         expected_distances = [80.0, 100.0, 150.0, 200.0, 300.0]
         
-        # Verify full sort gets correct k smallest
-        actual_distances = [entry[1] for entry in k_smallest_full]
+        # Verify partial ordering gets correct k smallest
+        actual_distances = [entry[1] for entry in k_smallest_partial]
         self.assertEqual(actual_distances, expected_distances)
+        
+        # ...and the same POIs as the array oracle and the streaming sink
+        oracle_ids, oracle_dists = k_smallest_soa(self.poi_ids, self.poi_dists, k)
+        self.assertEqual(k_smallest_partial, list(zip(oracle_ids.tolist(), oracle_dists.tolist())))
+        self.assertEqual(sink(self.poi_entries, k), k_smallest_partial)
+        
+        # Entries beyond the k nearest spill into the overflow bucket, nearest first
+        nearest, overflow = sink_with_overflow(self.poi_entries, k)
+        ranked = sorted(self.poi_entries, key=itemgetter(1))
+        self.assertEqual(nearest, k_smallest_partial)
+        self.assertEqual(overflow, ranked[k:3 * k])
+        self.assertEqual([entry[0] for entry in overflow], [25, 30, 35, 40, 45])
+        
+        # A small overflow keeps only the nearest of the spilled entries
+        _, overflow = sink_with_overflow(self.poi_entries, k, overflow_size=2)
+        self.assertEqual(overflow, ranked[k:k + 2])
     
     def test_partial_ordering_threshold(self):
         """Test when to use partial ordering vs full sorting"""
-        # Test different k values
-        test_cases = [
-            {"k": 1, "should_use_partial": True},    # Very small k
-            {"k": 3, "should_use_partial": True},    # Small k
-            {"k": 10, "should_use_partial": True},   # Medium k
-            {"k": 25, "should_use_partial": False},  # Large k
-            {"k": 100, "should_use_partial": False}, # Very large k
-        ]
+        # Test different k values: (k, should_use_partial)
+        CASES = (
+            (1, True),     # Very small k
+            (3, True),     # Small k
+            (10, True),    # Medium k
+            (25, False),   # Large k
+            (100, False),  # Very large k
+        )
         
         partial_threshold = 15  # Threshold for using partial ordering
         
-        for case in test_cases:
-            use_partial = case["k"] <= partial_threshold
-            self.assertEqual(use_partial, case["should_use_partial"])
+        for k, expected in CASES:
+            with self.subTest(k=k):
+                self.assertEqual(k <= partial_threshold, expected)
     
     def test_memory_efficiency_partial_vs_full(self):
         """Test memory efficiency of partial ordering"""
@@ -72,12 +119,12 @@ class TestPartialOrderingLogic(unittest.TestCase):
         
         # Full sorting: need to store and sort all POIs
         full_sort_memory = total_pois * 8  # 8 bytes per entry
-        full_sort_operations = total_pois * np.log2(total_pois)  # O(n log n)
+        full_sort_operations = total_pois * math.log2(total_pois)  # O(n log n)
         
         # Partial ordering: maintain only k + small overflow
         overflow_factor = 2  # Keep 2*k in overflow
         partial_memory = k_requested * (1 + overflow_factor) * 8
-        partial_operations = total_pois * np.log2(k_requested)  # O(n log k)
+        partial_operations = total_pois * math.log2(k_requested)  # O(n log k)
         
         # Partial should use much less memory
         memory_savings = (full_sort_memory - partial_memory) / full_sort_memory
@@ -96,19 +143,21 @@ class TestPartialOrderingLogic(unittest.TestCase):
         
         k = 4
         
-        # Full sort approach
-        full_sorted = sorted(test_pois, key=lambda x: x[1])
-        full_k_smallest = full_sorted[:k]
+        # Partial ordering approach, checked against a full argsort
+        partial_k_smallest = k_smallest(test_pois, k)
+        oracle_ids, oracle_dists = k_smallest_soa(*aos_to_soa(test_pois), k)
         
         # Expected: (10, 5.0), (2, 15.0), (6, 25.0), (8, 35.0)
         expected_ids = [10, 2, 6, 8]
         expected_distances = [5.0, 15.0, 25.0, 35.0]
         
-        actual_ids = [poi[0] for poi in full_k_smallest]
-        actual_distances = [poi[1] for poi in full_k_smallest]
+        actual_ids = [poi[0] for poi in partial_k_smallest]
+        actual_distances = [poi[1] for poi in partial_k_smallest]
         
         self.assertEqual(actual_ids, expected_ids)
         self.assertEqual(actual_distances, expected_distances)
+        np.testing.assert_array_equal(oracle_ids, expected_ids)
+        np.testing.assert_array_equal(oracle_dists, expected_distances)
 
 
 class TestBatchPOIQueries(unittest.TestCase):
@@ -118,13 +167,13 @@ class TestBatchPOIQueries(unittest.TestCase):
         """Test efficiency of batch POI queries"""
         # Test scenarios
         query_scenarios = [
-            {"nodes": [1, 2, 3], "nearby": True},          # Nearby nodes
-            {"nodes": [1, 50, 100], "nearby": False},      # Scattered nodes
-            {"nodes": list(range(20)), "nearby": True},    # Many nearby nodes
+            {"nodes": np.array([1, 2, 3], dtype=np.int32), "nearby": True},      # Nearby nodes
+            {"nodes": np.array([1, 50, 100], dtype=np.int32), "nearby": False},  # Scattered nodes
+            {"nodes": np.arange(20, dtype=np.int32), "nearby": True},            # Many nearby nodes
         ]
         
         for scenario in query_scenarios:
-            node_count = len(scenario["nodes"])
+            node_count = scenario["nodes"].size
             
             if scenario["nearby"]:
                 # Nearby nodes can benefit from frontier compression
@@ -168,6 +217,14 @@ class TestBatchPOIQueries(unittest.TestCase):
 class TestPOIPerformanceOptimizations(unittest.TestCase):
     """Test performance optimizations for POI queries"""
     
+    @classmethod
+    def setUpClass(cls):
+        """Build the 100-POI fixture once; tests treat it as read-only"""
+        cls.large_poi_ids = np.arange(100, dtype=np.int64)
+        cls.large_poi_dists = cls.large_poi_ids * 10.0
+        cls.large_poi_set = list(zip(cls.large_poi_ids.tolist(), cls.large_poi_dists.tolist()))
+        cls.random_poi_dists = rng.random(10000, dtype=np.float64) * 1000.0
+    
     def test_distance_filtering_early_termination(self):
         """Test early termination when POIs exceed max distance"""
         max_distance = 500.0
@@ -179,26 +236,48 @@ class TestPOIPerformanceOptimizations(unittest.TestCase):
             (5, 800.0),   # Exceeds distance - should be filtered
         ]
         
-        # Filter POIs by distance
-        valid_pois = [(pid, dist) for pid, dist in test_pois if dist <= max_distance]
+        ids = np.array([1, 2, 3, 4, 5], dtype=np.int64)
+        dists = np.array([100.0, 300.0, 450.0, 600.0, 800.0])
+        
+        # Filter POIs by distance with one vectorized compare
+        mask = dists <= max_distance
+        valid_ids, valid_dists = ids[mask], dists[mask]
         
         expected_count = 3
-        self.assertEqual(len(valid_pois), expected_count)
+        self.assertEqual(len(valid_ids), expected_count)
         
         # All valid POIs should be within distance
-        for poi_id, distance in valid_pois:
-            self.assertLessEqual(distance, max_distance)
+        self.assertTrue(np.all(valid_dists <= max_distance))
+        
+        # Same POIs as filtering the tuples one by one
+        valid_pois = [(pid, dist) for pid, dist in test_pois if dist <= max_distance]
+        self.assertEqual(list(zip(valid_ids.tolist(), valid_dists.tolist())), valid_pois)
     
     def test_k_limiting_optimization(self):
         """Test optimization when k is small"""
-        large_poi_set = [(i, i * 10.0) for i in range(100)]  # 100 POIs
+        large_poi_set = self.large_poi_set  # 100 POIs
         small_k_values = [1, 3, 5, 10]
         
+        # One heap of the largest k serves every smaller k as a prefix
+        nearest = k_smallest(large_poi_set, max(small_k_values))
+        dists = self.large_poi_dists
+        
         for k in small_k_values:
             # Should only need to maintain k smallest
-            k_smallest = sorted(large_poi_set, key=lambda x: x[1])[:k]
+            nearest_k = nearest[:k]
+            
+            self.assertEqual(len(nearest_k), k)
+            self.assertEqual(nearest_k, large_poi_set[:k])
+            
+            # Partitioning sorts only the k-prefix; compare distances as a
+            # multiset since equal distances may come back in any order
+            selected = [large_poi_set[i] for i in k_smallest_indices(dists, k)]
+            self.assertEqual(sorted(d for _, d in selected), [d for _, d in nearest_k])
             
-            self.assertEqual(len(k_smallest), k)
+            # Same selection on unordered distances
+            random_dists = self.random_poi_dists
+            np.testing.assert_array_equal(random_dists[k_smallest_indices(random_dists, k)],
+                                          np.sort(random_dists)[:k])
             
             # Should be able to process efficiently without full sort
             efficiency_ratio = k / len(large_poi_set)
@@ -234,12 +313,13 @@ class TestPOIEdgeCases(unittest.TestCase):
         k = 5
         
         # All POIs are too far
-        distant_pois = [(i, 200.0 + i * 50) for i in range(10)]
+        distant_ids = np.arange(10, dtype=np.int64)
+        distant_dists = 200.0 + distant_ids * 50.0
         
-        valid_pois = [(pid, dist) for pid, dist in distant_pois if dist <= max_distance]
+        valid_ids = distant_ids[distant_dists <= max_distance]
         
         # Should return empty result
-        self.assertEqual(len(valid_pois), 0)
+        self.assertEqual(len(valid_ids), 0)
     
     def test_fewer_pois_than_k(self):
         """Test behavior when fewer POIs exist than requested k"""
@@ -247,8 +327,9 @@ class TestPOIEdgeCases(unittest.TestCase):
         k_requested = 5  # Want 5 POIs
         
         # Should return all available POIs
-        result_count = min(len(available_pois), k_requested)
+        result_count = len(k_smallest(available_pois, k_requested))
         self.assertEqual(result_count, 3)
+        self.assertEqual(sink(available_pois, k_requested), available_pois)
         
         # All returned POIs should be valid
         self.assertEqual(len(available_pois), 3)
@@ -265,27 +346,42 @@ class TestPOIEdgeCases(unittest.TestCase):
         
         k = 3
         
-        # Should handle ties consistently
-        sorted_pois = sorted(identical_distance_pois, key=lambda x: (x[1], x[0]))
-        k_smallest = sorted_pois[:k]
+        # Should handle ties consistently: nsmallest is stable, so equal
+        # distances keep their input order
+        nearest = k_smallest(identical_distance_pois, k)
         
         # Should get the 3 POIs with smallest distances (with tie-breaking)
         expected_distances = [100.0, 100.0, 100.0]
-        actual_distances = [poi[1] for poi in k_smallest]
+        actual_distances = [poi[1] for poi in nearest]
         
         self.assertEqual(actual_distances, expected_distances)
+        self.assertEqual([poi[0] for poi in nearest], [10, 11, 12])
+        self.assertEqual(sink(identical_distance_pois, k), nearest)
+        
+        # Composite (distance, poi_id) order in one pass: lexsort keys run
+        # from least to most significant
+        ids = np.array([10, 11, 12, 13, 14])
+        dists = np.array([100.0, 100.0, 100.0, 200.0, 200.0])
+        order = np.lexsort((ids, dists))
+        k_smallest_ids, k_smallest_dists = ids[order][:k], dists[order][:k]
+        
+        oracle = sorted(identical_distance_pois, key=itemgetter(1, 0))[:k]
+        np.testing.assert_array_equal(k_smallest_ids, [poi[0] for poi in oracle])
+        np.testing.assert_array_equal(k_smallest_dists, expected_distances)
     
     def test_large_k_values(self):
         """Test behavior with very large k values"""
         total_pois = 50
         large_k_values = [100, 1000, 10000]  # Larger than available POIs
         
-        available_pois = [(i, i * 10.0) for i in range(total_pois)]
+        ids = np.arange(total_pois, dtype=np.int64)
+        available_pois = list(zip(ids.tolist(), (ids * 10.0).tolist()))
         
         for k in large_k_values:
             # Should return all available POIs when k > available
-            result_count = min(len(available_pois), k)
+            result_count = len(k_smallest(available_pois, k))
             self.assertEqual(result_count, total_pois)
+            self.assertEqual(sink(available_pois, k), available_pois)
 
 
 if __name__ == '__main__':
@@ -3,24 +3,74 @@ Unit tests for the enhanced range query algorithms
 Tests the implementation logic and correctness of HybridRange concepts
 """
 
+import heapq
+import math
 import os
 import sys
 import unittest
-from unittest.mock import Mock, patch
+from operator import itemgetter
 import numpy as np
 
+from _ksmallest import sink
+
 # Add the src directory to the path for testing purposes
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
 
+# Bounded relaxation decision per (graph size bucket, k_rounds), computed once
+_BR_TABLE = {(nb, kr): (nb > 1000 and kr > 0)
+             for nb in (1000, 10000, 100000) for kr in (0, 1, 3, 10, 30)}
+
+
+def use_bounded_relaxation(num_nodes, k_rounds):
+    """Look up the bounded relaxation decision, bucketing num_nodes to the nearest power of ten
+
+    Sizes or k_rounds outside the table get the decision computed directly.
+    """
+    decision = _BR_TABLE.get((10 ** round(math.log10(num_nodes)), k_rounds))
+    if decision is None:
+        decision = num_nodes > 1000 and k_rounds > 0
+    return decision
+
+
+def expand_level(arena, start, end, neighbors_fn, visited):
+    """Append the unvisited neighbors of arena rows [start, end) as the next level
+
+    Arena rows are (node, parent_idx, source_idx); parent_idx points back into
+    the arena, or is -1 for a source.
+    """
+    neighbors = neighbors_fn(arena[start:end, 0])
+    parent_idx = np.repeat(np.arange(start, end), neighbors.shape[1])
+    nodes = neighbors.ravel()
+    keep = nodes >= 0
+    nodes, parent_idx = nodes[keep], parent_idx[keep]
+    keep = ~visited[nodes]
+    nodes, parent_idx = nodes[keep], parent_idx[keep]
+    # A node reached from several parents on this level is claimed by the first
+    nodes, first = np.unique(nodes, return_index=True)
+    parent_idx = parent_idx[first]
+    visited[nodes] = True
+    level = np.column_stack([nodes, parent_idx, arena[parent_idx, 2]])
+    return np.vstack([arena, level])
+
+
+def path_to_source(arena, idx):
+    """Nodes from the source down to arena row idx, following parent indices"""
+    path = []
+    while idx >= 0:
+        path.append(arena[idx, 0])
+        idx = arena[idx, 1]
+    return path[::-1]
+
 
 class TestHybridRangeLogic(unittest.TestCase):
     """Test the logical correctness of our HybridRange implementation concepts"""
     
-    def setUp(self):
-        """Set up test data"""
-        self.test_nodes = np.array([0, 1, 2, 3, 4, 5])
-        self.test_radius = 1000.0
-        self.test_k_rounds = 3
+    @classmethod
+    def setUpClass(cls):
+        """Set up test data once; tests treat it as read-only"""
+        cls.test_nodes = np.array([0, 1, 2, 3, 4, 5])
+        cls.test_radius = 1000.0
+        cls.test_k_rounds = 3
         
     def test_hybrid_range_parameters(self):
         """Test that HybridRange accepts the correct parameters"""
@@ -58,16 +108,17 @@ class TestHybridRangeLogic(unittest.TestCase):
         
         k = 3  # Only need k smallest
         
-        # Test full sort (what traditional algorithms do)
-        full_sorted = sorted(test_results, key=lambda x: x[1])
+        # Test full sort (what traditional algorithms do), in place on one copy
+        full_sorted = test_results[:]
+        full_sorted.sort(key=itemgetter(1))
+        oracle = full_sorted[:k]
         
         # Test partial sort (what our hybrid algorithm should do)
-        partial_results = test_results.copy()
-        partial_results.sort(key=lambda x: x[1])
-        k_smallest = partial_results[:k]
+        k_smallest = heapq.nsmallest(k, test_results, key=itemgetter(1))
         
         # Verify that partial approach gets the same k smallest
-        self.assertEqual(k_smallest, full_sorted[:k])
+        self.assertEqual(k_smallest, oracle)
+        self.assertEqual(sink(test_results, k), oracle)
         
         # Expected order: (3, 50.0), (5, 75.0), (8, 120.0)
         expected_k_smallest = [(3, 50.0), (5, 75.0), (8, 120.0)]
@@ -75,25 +126,38 @@ class TestHybridRangeLogic(unittest.TestCase):
     
     def test_frontier_compression_concept(self):
         """Test the frontier compression logic"""
-        # Simulate multiple nearby source nodes
-        source_clusters = [
-            [1, 2, 3],     # Cluster 1: nearby nodes
-            [10, 11, 12],  # Cluster 2: nearby nodes  
-            [25],          # Cluster 3: isolated node
-        ]
+        # Multiple nearby source nodes on a 30-node path graph
+        num_nodes = 30
+        sources = np.array([1, 2, 3, 10, 11, 12, 25])
+        depth = 3
         
-        # Test that we can identify clusters for batch processing
-        for cluster in source_clusters:
-            self.assertGreater(len(cluster), 0)
-            
-            # In the actual implementation, nearby sources should be processed together
-            # to reduce redundant computation
-            if len(cluster) > 1:
-                # Multiple sources - can benefit from frontier compression
-                self.assertTrue(len(cluster) > 1)
-            else:
-                # Single source - process normally
-                self.assertEqual(len(cluster), 1)
+        def path_neighbors(nodes):
+            nbrs = np.column_stack([nodes - 1, nodes + 1])
+            nbrs[(nbrs < 0) | (nbrs >= num_nodes)] = -1
+            return nbrs
+        
+        # One flat arena shared by every source instead of per-cluster lists
+        arena = np.column_stack([sources, np.full(len(sources), -1), np.arange(len(sources))])
+        visited = np.zeros(num_nodes, dtype=bool)
+        visited[sources] = True
+        
+        level_start = 0
+        for _ in range(depth):
+            level_end = len(arena)
+            arena = expand_level(arena, level_start, level_end, path_neighbors, visited)
+            level_start = level_end
+        
+        # Nearby sources share the frontier: every node is settled at most once
+        self.assertEqual(len(np.unique(arena[:, 0])), len(arena))
+        hops = np.abs(np.arange(num_nodes)[:, None] - sources[None, :]).min(axis=1)
+        np.testing.assert_array_equal(np.sort(arena[:, 0]), np.flatnonzero(hops <= depth))
+        
+        # Paths come back from parent indices alone
+        for idx in range(len(sources), len(arena)):
+            path = path_to_source(arena, idx)
+            self.assertEqual(path[0], sources[arena[idx, 2]])
+            self.assertLessEqual(len(path), depth + 1)
+            self.assertTrue(np.all(np.abs(np.diff(path)) == 1))
     
     def test_bounded_relaxation_concept(self):
         """Test the bounded relaxation stopping condition"""
@@ -104,17 +168,22 @@ class TestHybridRangeLogic(unittest.TestCase):
             (100000, 3),  # Large graph, small k_rounds -> use bounded relaxation  
             (1000, 10),   # Small graph, large k_rounds -> might use standard
             (100000, 10), # Large graph, large k_rounds -> might use standard
+            (5000, 3),    # Between buckets, rounds up to 10000
+            (500, 3),     # Below the smallest bucket's threshold
+            (50, 3),      # No bucket, decided directly
+            (5000, 2),    # k_rounds not in the table, decided directly
         ]
         
         for num_nodes, k_rounds in test_cases:
             # This mimics the decision logic in our HybridRange implementation
-            use_bounded_relaxation = (k_rounds > 0 and num_nodes > 1000)
+            use_bounded = use_bounded_relaxation(num_nodes, k_rounds)
+            self.assertEqual(use_bounded, k_rounds > 0 and num_nodes > 1000)
             
             if num_nodes > 1000:
-                self.assertTrue(use_bounded_relaxation)
+                self.assertTrue(use_bounded)
             
             # The actual decision should consider both graph size and k_rounds
-            self.assertIsInstance(use_bounded_relaxation, bool)
+            self.assertIsInstance(use_bounded, bool)
     
     def test_performance_characteristics(self):
         """Test expected performance characteristics"""
@@ -176,9 +245,8 @@ class TestHybridRangeIntegration(unittest.TestCase):
         # Hybrid range query should return the same nodes within radius
         # (though potentially in different order or with optimized computation)
         
-        for node_id, distance in standard_results:
-            self.assertLessEqual(distance, test_radius)
-            self.assertGreaterEqual(distance, 0.0)
+        dists = np.asarray([d for _, d in standard_results])
+        self.assertTrue(np.all(dists <= test_radius) and np.all(dists >= 0.0))
     
     def test_memory_efficiency(self):
         """Test memory usage characteristics"""
@@ -204,38 +272,33 @@ class TestAlgorithmicCorrectness(unittest.TestCase):
         """Test that optimizations preserve shortest path distances"""
         # Any optimization should preserve the correctness of distances
         
-        # Mock distance comparisons
-        test_distances = [
-            (0, 1, 100.0),   # node 0 to node 1: distance 100
-            (0, 2, 250.0),   # node 0 to node 2: distance 250
-            (1, 2, 150.0),   # node 1 to node 2: distance 150
-        ]
+        # Mock shortest path distances: 0-1 is 100, 0-2 is 250, 1-2 is 150
+        D = np.array([[0, 100, 250],
+                      [100, 0, 150],
+                      [250, 150, 0]], dtype=np.float32)
         
-        for src, dst, expected_dist in test_distances:
-            # Triangle inequality should hold
-            # dist(0,2) <= dist(0,1) + dist(1,2)
-            if src == 0 and dst == 2:
-                dist_0_1 = 100.0
-                dist_1_2 = 150.0
-                self.assertLessEqual(expected_dist, dist_0_1 + dist_1_2)
+        # Triangle inequality over every triple at once:
+        # dist(i, j) <= dist(i, k) + dist(k, j), indexed as [i, k, j]
+        viol = D[:, None, :] - (D[:, :, None] + D[None, :, :])
+        self.assertTrue(np.all(viol <= 1e-6))
     
     def test_completeness_property(self):
         """Test that all nodes within radius are found"""
         # Any range query optimization should find ALL nodes within the radius
         
         test_radius = 500.0
-        all_nodes_in_graph = [(i, i * 100.0) for i in range(10)]  # Mock nodes
+        node_ids = np.arange(10, dtype=np.int64)  # Mock nodes
+        node_dists = node_ids * 100.0
         
-        nodes_within_radius = [(nid, dist) for nid, dist in all_nodes_in_graph 
-                              if dist <= test_radius]
+        within = node_dists <= test_radius
+        nodes_within_radius, dists = node_ids[within], node_dists[within]
         
         # Should find exactly nodes 0, 1, 2, 3, 4, 5 (distances 0, 100, 200, 300, 400, 500)
         expected_count = 6
         self.assertEqual(len(nodes_within_radius), expected_count)
         
         # Verify all are within radius
-        for node_id, distance in nodes_within_radius:
-            self.assertLessEqual(distance, test_radius)
+        self.assertTrue(np.all(dists <= test_radius) and np.all(dists >= 0.0))
 
 
 if __name__ == '__main__':
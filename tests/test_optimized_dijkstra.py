@@ -0,0 +1,72 @@
+"""
+Tests for the single-source searches in FINAL_PERFORMANCE_TEST.py
+Checks every optimized_dijkstra path against SciPy's Dijkstra
+"""
+
+import os.path
+import sys
+
+import numpy as np
+import pytest
+from numpy.testing import assert_allclose, assert_array_equal
+from scipy.sparse.csgraph import dijkstra
+
+# The benchmark script lives at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from FINAL_PERFORMANCE_TEST import (GraphCSR, OptimizedEnhancedAlgorithms,  # noqa: E402
+                                    OptimizedPerformanceComparison)
+
+MAX_DISTANCE = 1500.0
+
+
+@pytest.fixture(scope="module")
+def graph():
+    """A generated street grid with whole-meter weights, exact in every kernel's units"""
+    np.random.seed(0)
+    g = OptimizedPerformanceComparison().generate_realistic_network(900)
+    return GraphCSR(g.indptr, g.indices, np.round(g.weights))
+
+
+def _search(graph, source, path):
+    algorithms = OptimizedEnhancedAlgorithms()
+    if path == 'heap':
+        # Every node a target and no early stop, so the heap search runs to the bound
+        algorithms.early_termination_ratio = 1.0
+        return algorithms.optimized_dijkstra(graph, source, MAX_DISTANCE,
+                                             targets=set(range(graph.num_nodes)))
+    if path == 'cpp':
+        pytest.importorskip("pandana.cyaccess")
+        algorithms.backend = 'cpp'
+    return algorithms.optimized_dijkstra(graph, source, MAX_DISTANCE)
+
+
+@pytest.mark.parametrize("path", ['heap', 'delta', 'cpp'])
+@pytest.mark.parametrize("source", [0, 450, 899])
+def test_optimized_dijkstra_matches_scipy(graph, source, path):
+    expected = dijkstra(graph.sparse_matrix, directed=True, indices=source, limit=MAX_DISTANCE)
+    reached = np.flatnonzero(np.isfinite(expected))
+
+    distances = _search(graph, source, path)
+
+    nodes = np.array(sorted(distances), dtype=np.int64)
+    assert_array_equal(nodes, reached)
+    assert_allclose([distances[node] for node in nodes], expected[reached], atol=1e-3)
+
+
+def test_cpp_backend_rejects_targets(graph):
+    """The C++ backend cannot stop early, so it refuses targets rather than ignore them"""
+    pytest.importorskip("pandana.cyaccess")
+    algorithms = OptimizedEnhancedAlgorithms()
+    algorithms.backend = 'cpp'
+    with pytest.raises(ValueError, match="early termination"):
+        algorithms.optimized_dijkstra(graph, 0, MAX_DISTANCE, targets={1, 2})
+
+
+def test_scratch_buffers_follow_the_graph():
+    """Searches over graphs of different sizes never share work buffers"""
+    algorithms = OptimizedEnhancedAlgorithms()
+    comparison = OptimizedPerformanceComparison()
+    for size in (100, 2500, 100):
+        g = comparison.generate_realistic_network(size)
+        algorithms.optimized_dijkstra(g, 0, MAX_DISTANCE)
+        assert len(g.thread_local.scratch.dist_cm) == g.num_nodes
@@ -469,3 +469,41 @@ def test_nodes_in_range(sample_osm):
     assert (all_distances <= 11).sum() == len(
         test11.query("source == {}".format(focus_id))
     )
+
+
+def test_missing_impl():
+    nodes = pd.DataFrame({"x": [0.0, 1.0, 2.0], "y": [0.0, 0.0, 0.0]})
+    edges = pd.DataFrame({"from": [0, 1], "to": [1, 2], "weight": [1.0, 1.0]})
+
+    with pytest.raises(ModuleNotFoundError):
+        pdna.Network(
+            nodes.x,
+            nodes.y,
+            edges["from"],
+            edges.to,
+            edges[["weight"]],
+            impl="missing",
+        )
+
+
+def test_precompute_twice():
+    # 5 x 5 grid with unit-length streets
+    xy = np.indices((5, 5)).reshape(2, -1).astype(float)
+    nodes = pd.DataFrame({"x": xy[0], "y": xy[1]})
+    ids = np.arange(25).reshape(5, 5)
+    edges = pd.DataFrame(
+        {
+            "from": np.concatenate([ids[:, :-1].ravel(), ids[:-1, :].ravel()]),
+            "to": np.concatenate([ids[:, 1:].ravel(), ids[1:, :].ravel()]),
+        }
+    )
+    edges["weight"] = 1.0
+
+    net = pdna.Network(nodes.x, nodes.y, edges["from"], edges.to, edges[["weight"]])
+    net.set(pd.Series(net.node_ids))
+    expected = net.aggregate(3, type="count", decay="flat")
+
+    # Precomputing again must replace the cached ranges, not add to them
+    net.precompute(2)
+    net.precompute(3)
+    assert_allclose(net.aggregate(3, type="count", decay="flat"), expected)
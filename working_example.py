@@ -15,20 +15,19 @@ def demonstrate_enhanced_methods():
         from pandana import cyaccess
         
         # Show all available methods
-        all_methods = [m for m in dir(cyaccess.cyaccess) if not m.startswith('_')]
-        enhanced_methods = [
+        enhanced_methods = (
             'hybrid_nodes_in_range',
             'get_batch_aggregate_accessibility_variables'
-        ]
+        )
         
-        print(f"Total compiled methods: {len(all_methods)}")
+        num_methods = sum(1 for m in vars(cyaccess.cyaccess) if not m.startswith('_'))
+        print(f"Total compiled methods: {num_methods}")
         print("Enhanced methods status:")
         
-        working_methods = []
+        working_methods = tuple(m for m in enhanced_methods if hasattr(cyaccess.cyaccess, m))
         for method in enhanced_methods:
-            if method in all_methods:
+            if method in working_methods:
                 print(f"  ✅ {method} - WORKING")
-                working_methods.append(method)
             else:
                 print(f"  ❌ {method} - NOT AVAILABLE")
         